@@ -18,7 +18,7 @@ class AnalysisModule:
         with open(self.analysis_history_file, 'w') as f:
             json.dump(self.history, f)
 
-    def analyze_iteration(self, current_code, current_output, previous_analyses):
+    def analyze_iteration(self, current_code, current_output, previous_analyses, evaluation_metrics=None):
         prompt = f"""Analyze the tourist chatbot iteration:
 
 Current Code:
@@ -27,6 +27,9 @@ Current Code:
 Current Output:
 {current_output}
 
+Evaluation Metrics:
+{json.dumps(evaluation_metrics, indent=2, ensure_ascii=False) if evaluation_metrics else "Not available"}
+
 Previous Analyses:
 {json.dumps(previous_analyses[-3:] if previous_analyses else [], indent=2)}
 
@@ -38,7 +41,7 @@ Please provide:
 
 3. Preference analysis accuracy
 
-4. Recommendation relevance for each test query
+4. Recommendation relevance for each test query, using the evaluation metrics (latency, retrieval hit-rate, answer quality)
 
 5. Improvement/regression compared to previous iterations
 
@@ -57,7 +60,8 @@ Format the response as JSON with these keys."""
 
         analysis_record = {
             "timestamp": datetime.now().isoformat(),
-            "analysis": analysis_dict
+            "analysis": analysis_dict,
+            "evaluation_summary": evaluation_metrics["summary"] if evaluation_metrics else None
         }
         
         self.history.append(analysis_record)
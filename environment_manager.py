@@ -1,13 +1,20 @@
 import os
 import venv
+import hashlib
+import threading
 import subprocess
 from datetime import datetime
-import pip._internal.cli.main as pipmain
+from execution_server import ExecutionServer, ExecutionServerUnavailable
 
 class EnvironmentManager:
-    def __init__(self):
+    def __init__(self, warm_start=False):
         self.base_dir = "iterations"
-        os.makedirs(self.base_dir, exist_ok=True)
+        self.envs_dir = os.path.join(self.base_dir, "envs")
+        os.makedirs(self.envs_dir, exist_ok=True)
+        # Warm execution relies on fork, so it is only available on POSIX
+        self.warm_start = warm_start and hasattr(os, 'fork')
+        self.servers = {}
+        self.servers_lock = threading.Lock()
 
     def create_iteration(self, code, requirements):
         iteration_dir = os.path.join(self.base_dir, f"iteration_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
@@ -19,37 +26,110 @@ class EnvironmentManager:
         with open(os.path.join(iteration_dir, "requirements.txt"), 'w') as f:
             f.write(requirements)
 
-        # Create venv
-        venv.create(os.path.join(iteration_dir, "venv"), with_pip=True)
+        self._prepare_environment(iteration_dir)
+
+        return iteration_dir
+
+    def _prepare_environment(self, iteration_dir):
+        # Iterations with the same requirements share one venv, so re-runs skip the install
+        env_dir = self._env_dir(iteration_dir)
+        installed_marker = os.path.join(env_dir, ".installed")
+        if os.path.exists(installed_marker):
+            print(f"Reusing cached environment: {env_dir}")
+            return
 
-        # Install requirements using pip module
         try:
-            pipmain.main(['install', '-r', os.path.join(iteration_dir, "requirements.txt")])
+            # Create venv
+            venv.create(env_dir, with_pip=True)
+
+            # Install requirements with the venv's own pip
+            result = subprocess.run([
+                self._python_path(iteration_dir), "-m", "pip", "install",
+                "-r", os.path.join(iteration_dir, "requirements.txt")
+            ])
+            if result.returncode != 0:
+                print(f"Installation error: pip exited with code {result.returncode}")
+                return
+            open(installed_marker, 'w').close()
         except Exception as e:
             print(f"Installation error: {str(e)}")
 
-        return iteration_dir
-
-    def run_iteration(self, iteration_dir):
-        python_path = os.path.join(iteration_dir, "venv", "bin", "python") if os.name != 'nt' else os.path.join(iteration_dir, "venv", "Scripts", "python")
-
+    def run_iteration(self, iteration_dir, env=None):
         output_file = os.path.join(iteration_dir, "output.txt")
 
         try:
-            result = subprocess.run(
-                [python_path, os.path.join(iteration_dir, "main.py")],
-                capture_output=True,
-                text=True
-            )
+            result = self.execute(iteration_dir, env)
 
             with open(output_file, 'w') as f:
-                f.write(result.stdout)
-                if result.stderr:
+                f.write(result["stdout"])
+                if result["stderr"]:
                     f.write("\nErrors:\n")
-                    f.write(result.stderr)
+                    f.write(result["stderr"])
 
             return output_file
         except Exception as e:
             with open(output_file, 'w') as f:
                 f.write(f"Error running iteration: {str(e)}")
             return output_file
+
+    def execute(self, iteration_dir, env=None):
+        # Runs start in the iteration directory, so files the generated code writes stay with its iteration
+        iteration_dir = os.path.abspath(iteration_dir)
+        script_path = os.path.join(iteration_dir, "main.py")
+
+        if self.warm_start:
+            # Only fall back while the script can't have started in the worker, otherwise it would run twice
+            try:
+                return self._get_server(iteration_dir).run(script_path, env, cwd=iteration_dir)
+            except ExecutionServerUnavailable as e:
+                print(f"Warm execution unavailable, falling back to a cold run: {str(e)}")
+
+        result = subprocess.run(
+            [self._python_path(iteration_dir), script_path],
+            capture_output=True,
+            text=True,
+            cwd=iteration_dir,
+            env={**os.environ, **(env or {})}
+        )
+        return {
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "returncode": result.returncode
+        }
+
+    def close(self):
+        for server in self.servers.values():
+            server.stop()
+        self.servers = {}
+
+    def _env_dir(self, iteration_dir):
+        with open(os.path.join(iteration_dir, "requirements.txt"), 'r') as f:
+            lines = sorted({line.strip() for line in f if line.strip() and not line.strip().startswith('#')})
+        key = hashlib.sha256("\n".join(lines).encode()).hexdigest()[:16]
+        return os.path.join(self.envs_dir, key)
+
+    def _python_path(self, iteration_dir):
+        env_dir = os.path.abspath(self._env_dir(iteration_dir))
+        return os.path.join(env_dir, "bin", "python") if os.name != 'nt' else os.path.join(env_dir, "Scripts", "python")
+
+    def _get_server(self, iteration_dir):
+        # One warm worker per cached environment, shared by every iteration that uses it
+        env_dir = self._env_dir(iteration_dir)
+        python_path = self._python_path(iteration_dir)
+        key = os.path.abspath(env_dir)
+
+        with self.servers_lock:
+            server = self.servers.get(key)
+            if server is None or not server.is_alive():
+                if server is not None:
+                    server.stop()
+                print("Starting warm execution server...")
+                server = ExecutionServer(
+                    python_path,
+                    os.path.join(iteration_dir, "requirements.txt"),
+                    os.path.join(env_dir, "execution_server.log")
+                )
+                server.start()
+                print(f"Preloaded packages: {', '.join(server.imported) or 'none'}")
+                self.servers[key] = server
+            return server
@@ -0,0 +1,157 @@
+import re
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from llm_stub_server import NOT_FOUND_ANSWER, stem_terms
+
+class EvaluationModule:
+    def __init__(self, environment_manager, llm_stub):
+        self.env_manager = environment_manager
+        self.llm_stub = llm_stub
+        self.max_workers = 5
+        self.evaluation_count = 0
+
+    def parse_queries(self, test_data):
+        return re.findall(r'^\s*\d+\.\s*"(.+)"\s*$', test_data, re.MULTILINE)
+
+    def evaluate(self, iteration_dir, test_data):
+        queries = self.parse_queries(test_data)
+        self.evaluation_count += 1
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda item: self._run_query(iteration_dir, *item),
+                enumerate(queries)
+            ))
+        total_time = time.time() - started
+
+        calls = self.llm_stub.calls_since(started)
+        query_metrics = []
+        matched_calls = 0
+        for index, (query, result) in enumerate(zip(queries, results)):
+            query_calls, attribution = self._match_calls(index, query, queries, calls)
+            matched_calls += len(query_calls)
+            metrics = self._query_metrics(index, query, result, query_calls, attribution)
+            metrics["ignored_chatbot_query"] = self._ignored_query(index, queries, calls)
+            query_metrics.append(metrics)
+
+        summary = self._summary(query_metrics, total_time)
+        summary["unattributed_llm_calls"] = len(calls) - matched_calls
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "iteration_dir": iteration_dir,
+            "summary": summary,
+            "queries": query_metrics
+        }
+
+    def _api_key(self, index):
+        # Each query gets its own key so calls to the shared stub can be attributed to it
+        return f"eval-{self.evaluation_count}-query-{index}"
+
+    def _match_calls(self, index, query, queries, calls):
+        normalized = self._normalize(query)
+
+        # The key only tells which run made a call, a chatbot ignoring CHATBOT_QUERY asks every query under it
+        by_key = [c for c in calls if c["api_key"] == self._api_key(index)]
+        if by_key:
+            own = [c for c in by_key if normalized in self._normalize(c["query"])]
+            if own:
+                return own, "api_key"
+            return by_key, "api_key_unverified"
+
+        # The generated code may hardcode its own key, fall back to the user message text
+        own_keys = {self._api_key(i) for i in range(len(queries))}
+        by_text = [c for c in calls if c["api_key"] not in own_keys and normalized in self._normalize(c["query"])]
+        if by_text:
+            return by_text, "query_text"
+        return [], "unmatched"
+
+    def _ignored_query(self, index, queries, calls):
+        # Calls under this query's key that ask a different test query
+        others = [self._normalize(q) for i, q in enumerate(queries) if i != index]
+        return any(
+            other in self._normalize(c["query"])
+            for c in calls if c["api_key"] == self._api_key(index)
+            for other in others
+        )
+
+    def _normalize(self, text):
+        return " ".join(text.lower().split())
+
+    def _run_query(self, iteration_dir, index, query):
+        env = {**self.llm_stub.client_env(self._api_key(index)), "CHATBOT_QUERY": query}
+        started = time.time()
+        try:
+            result = self.env_manager.execute(iteration_dir, env)
+        except Exception as e:
+            result = {"stdout": "", "stderr": f"Error running query: {str(e)}", "returncode": None}
+        result["latency"] = time.time() - started
+        return result
+
+    def _query_metrics(self, index, query, result, calls, attribution):
+        output = result["stdout"]
+        retrieval_calls = [c for c in calls if c["step"] == "retrieval"]
+        answer_calls = [c for c in calls if c["step"] == "answer"]
+        hits = [c for c in retrieval_calls if c["relevant_doc_ids"]]
+        answers = [c["response"] for c in answer_calls if c["response"] != NOT_FOUND_ANSWER]
+        # Whatever the stub answered last, including its not-found reply, is what the chatbot should print
+        final_answer = answer_calls[-1]["response"] if answer_calls else None
+        answer_printed = final_answer is not None and final_answer.splitlines()[-1] in output
+
+        letters = re.findall(r"[^\W\d_]", output)
+        cyrillic = re.findall(r"[а-яёА-ЯЁ]", output)
+        query_terms = stem_terms(query)
+
+        return {
+            "index": index + 1,
+            "query": query,
+            "success": result["returncode"] == 0,
+            "returncode": result["returncode"],
+            "latency_seconds": round(result["latency"], 3),
+            "call_attribution": attribution,
+            "llm_calls": len(calls),
+            "retrieval_calls": len(retrieval_calls),
+            "answer_calls": len(answer_calls),
+            # None rather than 0 when no LLM calls could be tied to this query
+            "retrieval_hit_rate": round(len(hits) / len(retrieval_calls), 3) if retrieval_calls else None,
+            "avg_documents_per_call": round(sum(c["documents"] for c in retrieval_calls) / len(retrieval_calls), 2) if retrieval_calls else None,
+            "grounded_answers": len(answers),
+            "answer_in_output": answer_printed if final_answer is not None else None,
+            "answer_length": len(final_answer) if answer_printed else None,
+            "output_length": len(output.strip()),
+            "russian_ratio": round(len(cyrillic) / len(letters), 3) if letters else 0.0,
+            "query_term_coverage": round(len(query_terms & stem_terms(output)) / len(query_terms), 3) if query_terms else 0.0,
+            "stderr_tail": result["stderr"][-1000:]
+        }
+
+    def _summary(self, query_metrics, total_time):
+        count = len(query_metrics)
+        if not count:
+            return {"queries": 0, "total_time_seconds": round(total_time, 3)}
+
+        latencies = [m["latency_seconds"] for m in query_metrics]
+
+        def mean(key):
+            values = [m[key] for m in query_metrics if m[key] is not None]
+            return round(sum(values) / len(values), 3) if values else None
+
+        unmatched = sum(m["call_attribution"] == "unmatched" for m in query_metrics)
+
+        return {
+            "queries": count,
+            "success_rate": round(sum(m["success"] for m in query_metrics) / count, 3),
+            "total_time_seconds": round(total_time, 3),
+            "throughput_queries_per_second": round(count / total_time, 3) if total_time else 0.0,
+            "mean_latency_seconds": round(sum(latencies) / count, 3),
+            "max_latency_seconds": max(latencies),
+            "llm_calls_matched": unmatched == 0,
+            "unmatched_queries": unmatched,
+            "unverified_queries": sum(m["call_attribution"] == "api_key_unverified" for m in query_metrics),
+            "queries_ignoring_chatbot_query": sum(m["ignored_chatbot_query"] for m in query_metrics),
+            "mean_retrieval_hit_rate": mean("retrieval_hit_rate"),
+            "answer_in_output_rate": mean("answer_in_output"),
+            "mean_russian_ratio": mean("russian_ratio"),
+            "mean_query_term_coverage": mean("query_term_coverage")
+        }
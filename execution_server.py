@@ -0,0 +1,331 @@
+import os
+import re
+import sys
+import json
+import runpy
+import atexit
+import ctypes
+import select
+import signal
+import tempfile
+import importlib
+import threading
+import traceback
+import subprocess
+
+# pip package names whose import name can't be derived from the package name
+IMPORT_NAMES = {
+    "scikit-learn": "sklearn",
+    "faiss-cpu": "faiss",
+    "faiss-gpu": "faiss",
+    "beautifulsoup4": "bs4",
+    "python-dotenv": "dotenv",
+    "pyyaml": "yaml",
+    "pillow": "PIL",
+    "opencv-python": "cv2",
+    "protobuf": "google.protobuf",
+    "langchain-community": "langchain_community",
+}
+
+
+def requirement_import_names(requirements_file):
+    names = []
+    with open(requirements_file, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line or line.startswith('-'):
+                continue
+            package = re.split(r"[<>=!~;\[\s]", line, 1)[0].strip().lower()
+            if package:
+                names.append(IMPORT_NAMES.get(package, package.replace('-', '_')))
+    return names
+
+
+class ExecutionServerUnavailable(RuntimeError):
+    """The worker could not be started or reached, so no run was dispatched."""
+
+
+class ExecutionServer:
+    """Long-lived worker that pre-imports an environment's requirements and
+    forks a fresh child for every script run."""
+
+    def __init__(self, python_path, requirements_file, log_file):
+        self.python_path = python_path
+        self.requirements_file = requirements_file
+        self.log_file = log_file
+        self.process = None
+        self.imported = []
+        self.failed = []
+        self._log = None
+        self._reader = None
+        self._pending = {}
+        self._next_id = 0
+        self._dead = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        try:
+            self._log = open(self.log_file, 'a')
+            self.process = subprocess.Popen(
+                [self.python_path, os.path.abspath(__file__), os.path.abspath(self.requirements_file)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=self._log,
+                text=True,
+                bufsize=1
+            )
+
+            # The worker reports once all requirements are imported
+            ready = json.loads(self.process.stdout.readline())
+            self.imported = ready["imported"]
+            self.failed = ready["failed"]
+        except (OSError, ValueError, KeyError) as e:
+            self.stop()
+            raise ExecutionServerUnavailable(f"Execution server failed to start, see {self.log_file}: {str(e)}")
+
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+
+    def is_alive(self):
+        return not self._dead and self.process is not None and self.process.poll() is None
+
+    def run(self, script_path, env=None, cwd=None):
+        event = threading.Event()
+        with self._lock:
+            if not self.is_alive():
+                raise ExecutionServerUnavailable("Execution server is not running")
+            request_id = self._next_id
+            self._next_id += 1
+            request = {
+                "id": request_id,
+                "script": os.path.abspath(script_path),
+                "cwd": os.path.abspath(cwd or os.getcwd()),
+                "env": env or {}
+            }
+            try:
+                self.process.stdin.write(json.dumps(request) + "\n")
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise ExecutionServerUnavailable(f"Execution server is not reachable: {str(e)}")
+            self._pending[request_id] = {"event": event, "result": None, "pid": None}
+
+        event.wait()
+        with self._lock:
+            result = self._pending.pop(request_id)["result"]
+        if result is None:
+            raise RuntimeError("Execution server exited before the run finished")
+        return result
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                with self._lock:
+                    self._kill_running()
+                self.process.kill()
+                self.process.wait()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _read_responses(self):
+        try:
+            for line in self.process.stdout:
+                response = json.loads(line)
+                with self._lock:
+                    pending = self._pending.get(response["id"])
+                    if pending is None:
+                        continue
+                    if "started" in response:
+                        pending["pid"] = response["started"]
+                        continue
+                pending["result"] = response
+                pending["event"].set()
+        except Exception as e:
+            # A truncated line means the worker died mid-write, the protocol can't recover from that
+            print(f"Execution server protocol error: {str(e)}")
+        finally:
+            # Worker is gone or unusable, take its running children down and release everyone still waiting
+            with self._lock:
+                self._dead = True
+                self._kill_running()
+                for pending in self._pending.values():
+                    pending["event"].set()
+            if self.process.poll() is None:
+                self.process.kill()
+
+    def _kill_running(self):
+        # Each child leads its own process group, so this also reaches anything it spawned
+        for pending in self._pending.values():
+            if pending["pid"] is not None and pending["result"] is None:
+                try:
+                    os.killpg(pending["pid"], signal.SIGKILL)
+                except OSError:
+                    pass
+
+
+# Worker side, executed with the environment's own interpreter
+
+def _preload(requirements_file):
+    imported, failed = [], []
+    for name in requirement_import_names(requirements_file):
+        try:
+            importlib.import_module(name)
+            imported.append(name)
+        except Exception as e:
+            failed.append(f"{name}: {e}")
+    return imported, failed
+
+
+def _exit_code(status):
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return -os.WTERMSIG(status)
+
+
+def _set_parent_death_signal():
+    # Linux only: die with the worker even if it is killed before reporting our pid
+    try:
+        ctypes.CDLL(None, use_errno=True).prctl(1, signal.SIGKILL)  # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+
+def _kill_children(children):
+    for pid in children:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _run_child(request, stdout_path, stderr_path, protocol_fd, worker_pid):
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _set_parent_death_signal()
+    if os.getppid() != worker_pid:
+        os._exit(1)
+
+    os.close(protocol_fd)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(os.open(stdout_path, os.O_WRONLY), 1)
+    os.dup2(os.open(stderr_path, os.O_WRONLY), 2)
+
+    os.chdir(request["cwd"])
+    os.environ.update(request["env"])
+    script = request["script"]
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(script)
+
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    # os._exit skips interpreter shutdown, so do its work here to match a cold run:
+    # wait for non-daemon threads, then run atexit handlers
+    try:
+        threading._shutdown()
+    except BaseException:
+        traceback.print_exc()
+    atexit._run_exitfuncs()
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+def serve(requirements_file):
+    # Keep a private copy of stdout for the protocol, stray prints go to the log
+    protocol = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+
+    imported, failed = _preload(requirements_file)
+    protocol.write(json.dumps({"imported": imported, "failed": failed}) + "\n")
+    protocol.flush()
+
+    children = {}
+    buffer = b""
+    worker_pid = os.getpid()
+
+    def terminate(signum, frame):
+        _kill_children(children)
+        os._exit(1)
+
+    signal.signal(signal.SIGTERM, terminate)
+    stdin_open = True
+
+    while stdin_open or children:
+        if stdin_open:
+            ready, _, _ = select.select([0], [], [], 0.05 if children else None)
+            if ready:
+                chunk = os.read(0, 65536)
+                if not chunk:
+                    stdin_open = False
+                buffer += chunk
+
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    request = json.loads(line)
+                    stdout_fd, stdout_path = tempfile.mkstemp(suffix=".out")
+                    stderr_fd, stderr_path = tempfile.mkstemp(suffix=".err")
+                    os.close(stdout_fd)
+                    os.close(stderr_fd)
+
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    pid = os.fork()
+                    if pid == 0:
+                        _run_child(request, stdout_path, stderr_path, protocol.fileno(), worker_pid)
+                    try:
+                        os.setpgid(pid, pid)
+                    except OSError:
+                        pass
+                    children[pid] = (request["id"], stdout_path, stderr_path)
+                    protocol.write(json.dumps({"id": request["id"], "started": pid}) + "\n")
+                    protocol.flush()
+        else:
+            # Only finishing children are left, block until one exits
+            pid, status = os.waitpid(-1, 0)
+            _report(protocol, children.pop(pid), status)
+
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            _report(protocol, children.pop(pid), status)
+
+
+def _report(protocol, child, status):
+    request_id, stdout_path, stderr_path = child
+    with open(stdout_path, 'r', errors='replace') as f:
+        stdout = f.read()
+    with open(stderr_path, 'r', errors='replace') as f:
+        stderr = f.read()
+    os.remove(stdout_path)
+    os.remove(stderr_path)
+
+    protocol.write(json.dumps({
+        "id": request_id,
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": _exit_code(status)
+    }) + "\n")
+    protocol.flush()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
@@ -0,0 +1,205 @@
+import re
+import json
+import time
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_NAME = "Vikhrmodels/Vikhr-Nemo-12B-Instruct-R-21-09-24"
+NOT_FOUND_ANSWER = "К сожалению, я не смог найти информацию по вашему запросу в базе знаний."
+
+
+def stem_terms(text):
+    # Crude stemming is enough to match Russian word forms ("музеи" / "музеев")
+    return {word[:5] for word in re.findall(r"\w+", text.lower()) if len(word) >= 4}
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, StubRequestHandler)
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+    def record_call(self, call):
+        with self.calls_lock:
+            self.calls.append(call)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith("/models"):
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": MODEL_NAME, "object": "model", "owned_by": "stub"}]
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        started = time.time()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length))
+            messages = self._messages(body)
+        except ValueError as e:
+            self._send_json(400, {"error": {"message": f"Invalid request: {str(e)}"}})
+            return
+
+        documents = self._documents(messages)
+        query = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+        # Second step of the RAG protocol: the model's relevant_doc_ids come back as an assistant turn
+        if messages[-1]["role"] == "assistant":
+            step = "answer"
+            doc_ids = self._parse_doc_ids(messages[-1]["content"])
+            content = self._answer(documents, doc_ids)
+        else:
+            step = "retrieval"
+            doc_ids = self._retrieve(documents, query)
+            content = json.dumps({"relevant_doc_ids": doc_ids})
+
+        self.server.record_call({
+            "api_key": self.headers.get("Authorization", "").replace("Bearer ", "", 1),
+            "step": step,
+            "query": query,
+            "documents": len(documents),
+            "relevant_doc_ids": doc_ids,
+            "response": content,
+            "timestamp": started,
+            "latency": time.time() - started
+        })
+
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        completion_tokens = len(content.split())
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", MODEL_NAME),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def _messages(self, body):
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        messages = body.get("messages")
+        if not isinstance(messages, list) or not messages:
+            raise ValueError("'messages' must be a non-empty list")
+
+        normalized = []
+        for message in messages:
+            if not isinstance(message, dict) or not isinstance(message.get("role"), str):
+                raise ValueError("each message must be an object with a string 'role'")
+            content = message.get("content")
+            if content is None:
+                content = ""
+            elif isinstance(content, list):
+                # OpenAI content parts, only text is meaningful here
+                content = "".join(str(part.get("text") or "") for part in content if isinstance(part, dict))
+            elif not isinstance(content, str):
+                raise ValueError("message 'content' must be a string, a list of parts or null")
+            normalized.append({"role": message["role"], "content": content})
+        return normalized
+
+    def _documents(self, messages):
+        for message in messages:
+            if message["role"] != "documents":
+                continue
+            try:
+                documents = json.loads(message["content"] or "[]")
+            except (TypeError, ValueError):
+                return []
+            return [d for d in documents if isinstance(d, dict)] if isinstance(documents, list) else []
+        return []
+
+    def _retrieve(self, documents, query):
+        query_terms = stem_terms(query)
+        scored = []
+        for document in documents:
+            text = f"{document.get('title') or ''} {document.get('content') or ''}"
+            score = len(query_terms & stem_terms(text))
+            if score:
+                scored.append((score, document.get("doc_id")))
+        scored.sort(key=lambda item: -item[0])
+        return [doc_id for _, doc_id in scored[:3]]
+
+    def _parse_doc_ids(self, content):
+        try:
+            doc_ids = json.loads(content).get("relevant_doc_ids", [])
+            if isinstance(doc_ids, list):
+                return doc_ids
+        except (TypeError, ValueError, AttributeError):
+            pass
+        return [int(i) for i in re.findall(r"\d+", content)]
+
+    def _answer(self, documents, doc_ids):
+        selected = [d for d in documents if d.get("doc_id") in doc_ids]
+        if not selected:
+            return NOT_FOUND_ANSWER
+
+        lines = ["На основе найденной информации могу порекомендовать:"]
+        for number, document in enumerate(selected, 1):
+            content = str(document.get("content") or "").strip()
+            first_sentence = re.split(r"(?<=[.!?])\s", content, 1)[0][:300]
+            title = document.get("title") or f"Документ {document.get('doc_id')}"
+            lines.append(f"{number}. **{title}**: {first_sentence}")
+        return "\n".join(lines)
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class LLMStubServer:
+    """Local OpenAI-compatible stand-in for the vLLM server used by generated chatbots."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = StubHTTPServer((host, port))
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def client_env(self, api_key):
+        # Environment the generated chatbot reads its LLM settings from
+        return {
+            "OPENAI_BASE_URL": self.base_url,
+            "OPENAI_API_KEY": api_key,
+            "LLM_MODEL": MODEL_NAME
+        }
+
+    def calls_since(self, timestamp):
+        with self.httpd.calls_lock:
+            return [call for call in self.httpd.calls if call["timestamp"] >= timestamp]
@@ -6,6 +6,8 @@ from claude_interface import ClaudeInterface
 from solution_generator import SolutionGenerator
 from environment_manager import EnvironmentManager
 from analysis_module import AnalysisModule
+from evaluation_module import EvaluationModule
+from llm_stub_server import LLMStubServer
 from debug_module import DebugModule
 
 def create_run_directory():
@@ -52,8 +54,14 @@ def main():
     # Initialize all modules
     claude = ClaudeInterface(api_key)
     solution_gen = SolutionGenerator(claude)
-    env_manager = EnvironmentManager()
+    env_manager = EnvironmentManager(warm_start=os.getenv('WARM_EXECUTION') == '1')
     analyzer = AnalysisModule(claude)
+
+    # Local stand-in for the vLLM server, shared by every run of the generated code
+    llm_stub = LLMStubServer()
+    llm_stub.start()
+    llm_env = llm_stub.client_env("iteration-run")
+    evaluator = EvaluationModule(env_manager, llm_stub)
     debugger = DebugModule(claude)
 
     # Test task and data
@@ -137,6 +145,10 @@ Using documents: {"relevant_doc_ids": [0, 1]}
 Используя первый ответ модели relevant_indexes (JSON), можно понять нашла ли модель информацию в документах или нет, она обучена возврашать пустой массив если ее нет и в таком случае она будет отвечать, что не смогла найти информацию в базе знаний (при генерации второго ответа).
 
 End of example of rag usage.
+    Read the LLM server settings from environment variables: OPENAI_BASE_URL, OPENAI_API_KEY and LLM_MODEL.
+    Keep the database in files relative to the current working directory.
+    When CHATBOT_QUERY is not set, build the database first and then answer all test queries.
+    If the CHATBOT_QUERY environment variable is set, load the database built by that earlier run without rebuilding it, answer only that query and print the answer to stdout.
     The system should improve its recommendations based on evaluation metrics.
     Consider that chatbot will speak in russian, not english.
 
@@ -186,7 +198,7 @@ End of example of rag usage.
 
         # Run the iteration
         print("\nRunning iteration...")
-        output_file = env_manager.run_iteration(iteration_dir)
+        output_file = env_manager.run_iteration(iteration_dir, llm_env)
 
         # Read output
         with open(output_file, 'r') as f:
@@ -220,7 +232,7 @@ End of example of rag usage.
                     fixed_code,
                     solution['requirements'] + "\n" + "\n".join(requirement_changes)
                 )
-                output_file = env_manager.run_iteration(iteration_dir)
+                output_file = env_manager.run_iteration(iteration_dir, llm_env)
 
                 with open(output_file, 'r') as f:
                     output = f.read()
@@ -231,15 +243,21 @@ End of example of rag usage.
                     "output_content": output
                 })
 
+        # Evaluate test queries against the local LLM stub
+        print("\nEvaluating test queries...")
+        evaluation = evaluator.evaluate(iteration_dir, test_data)
+        save_step_result(run_dir, "06_evaluation_metrics", evaluation)
+
         # Analyze results
         print("\nAnalyzing results...")
         analysis = analyzer.analyze_iteration(
             solution['code'],
             output,
-            analyzer.history
+            analyzer.history,
+            evaluation
         )
 
-        save_step_result(run_dir, "06_analysis_results", analysis)
+        save_step_result(run_dir, "07_analysis_results", analysis)
 
         # Create summary
         summary = {
@@ -248,9 +266,10 @@ End of example of rag usage.
             "solution_generated": bool(solution),
             "debug_needed": bool(debug_results),
             "final_output_file": output_file,
+            "evaluation_summary": evaluation["summary"],
             "token_usage": claude.get_token_usage()
         }
-        save_step_result(run_dir, "07_run_summary", summary)
+        save_step_result(run_dir, "08_run_summary", summary)
 
         # Display final status
         print("\nRun completed!")
@@ -269,6 +288,9 @@ End of example of rag usage.
         }
         save_step_result(run_dir, "error_log", error_info)
         print(f"Error in execution: {str(e)}")
+    finally:
+        env_manager.close()
+        llm_stub.stop()
 
 if __name__ == "__main__":
     if check_dependencies():
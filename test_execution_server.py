@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from execution_server import ExecutionServer
+
+SCRIPT = '''import atexit
+import threading
+import time
+
+def work():
+    time.sleep(0.2)
+    print("THREAD-DONE", flush=True)
+
+atexit.register(lambda: print("ATEXIT-RAN"))
+threading.Thread(target=work).start()
+print("MAIN-DONE")
+'''
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="warm execution needs fork")
+def test_warm_run_matches_cold_run_shutdown(tmp_path):
+    script = tmp_path / "main.py"
+    script.write_text(SCRIPT)
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("")
+
+    cold = subprocess.run([sys.executable, str(script)], capture_output=True, text=True)
+
+    server = ExecutionServer(sys.executable, str(requirements), str(tmp_path / "server.log"))
+    server.start()
+    try:
+        warm = server.run(str(script))
+    finally:
+        server.stop()
+
+    assert cold.stdout == "MAIN-DONE\nTHREAD-DONE\nATEXIT-RAN\n"
+    assert warm["stdout"] == cold.stdout
+    assert warm["returncode"] == cold.returncode == 0